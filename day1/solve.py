@@ -1,9 +1,20 @@
-from functools import partial, reduce
-from typing import Callable
+import os
+from collections import OrderedDict, deque
+from collections.abc import Generator, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial, reduce
+from itertools import repeat
+from os import PathLike
+from typing import BinaryIO, Callable
+
+import numpy as np
 
 from inputs import real_input, test_input, test_input_part_2
 
-ACCEPTED_WORDS = [
+CHUNK_SIZE = 1 << 20
+MEMO_SIZE = 1 << 16
+
+ACCEPTED_WORDS = (
     "zero",
     "one",
     "two",
@@ -14,7 +25,7 @@ ACCEPTED_WORDS = [
     "seven",
     "eight",
     "nine",
-]
+)
 
 
 def decimal_characters_to_value(decimal_characters: str) -> int:
@@ -26,18 +37,136 @@ def fix_calibration_value_part_1(faulty_calibration_value: str) -> int:
     return decimal_characters_to_value(decimal_characters)
 
 
-def fix_calibration_value_part_2(faulty_calibration_value: str) -> int:
-    decimal_characters = ""
-    for i, char in enumerate(faulty_calibration_value):
-        if 48 <= ord(char) <= 57:
-            decimal_characters += char
-        elif faulty_calibration_value[i : i + 3] in ACCEPTED_WORDS:
-            decimal_characters += str(ACCEPTED_WORDS.index(faulty_calibration_value[i : i + 3]))
-        elif faulty_calibration_value[i : i + 4] in ACCEPTED_WORDS:
-            decimal_characters += str(ACCEPTED_WORDS.index(faulty_calibration_value[i : i + 4]))
-        elif faulty_calibration_value[i : i + 5] in ACCEPTED_WORDS:
-            decimal_characters += str(ACCEPTED_WORDS.index(faulty_calibration_value[i : i + 5]))
-    return decimal_characters_to_value(decimal_characters)
+class DigitAutomaton:
+    transitions: list[dict[str, int]]
+    outputs: list[list[tuple[int, int]]]
+    longest_pattern: int
+
+    def __init__(self, patterns: dict[str, int]) -> None:
+        self.transitions = [{}]
+        self.outputs = [[]]
+        self.longest_pattern = max(map(len, patterns), default=0)
+
+        for pattern, value in patterns.items():
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.outputs.append([])
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            self.outputs[state].append((len(pattern), value))
+
+        failures = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                failures[next_state] = self.transitions[failures[state]].get(char, 0)
+            self.outputs[state] = sorted(self.outputs[state] + self.outputs[failures[state]])
+            self.transitions[state] = self.transitions[failures[state]] | self.transitions[state]
+
+    def matches(self, text: Iterable[str]) -> Generator[tuple[int, int], None, None]:
+        transitions = self.transitions
+        outputs = self.outputs
+        state = 0
+        for end, char in enumerate(text, start=1):
+            state = transitions[state].get(char, 0)
+            for length, value in outputs[state]:
+                yield end - length, value
+
+    def first_match(self, text: str) -> tuple[int, int] | None:
+        transitions = self.transitions
+        outputs = self.outputs
+        best_start, best_value = len(text), None
+        state = 0
+        for end, char in enumerate(text, start=1):
+            if end - self.longest_pattern >= best_start:
+                break
+            state = transitions[state].get(char, 0)
+            for length, value in outputs[state]:
+                if end - length < best_start:
+                    best_start, best_value = end - length, value
+        if best_value is None:
+            return None
+        return best_start, best_value
+
+
+@cache
+def compile_digit_automata(vocabulary: tuple[str, ...]) -> tuple[DigitAutomaton, DigitAutomaton]:
+    patterns = {str(value): value for value in range(10)} | {word: value for value, word in enumerate(vocabulary)}
+    return DigitAutomaton(patterns), DigitAutomaton({pattern[::-1]: value for pattern, value in patterns.items()})
+
+
+def is_decimal_character(char: str) -> bool:
+    return "0" <= char <= "9"
+
+
+def fix_calibration_value_part_1_early_exit(faulty_calibration_value: str) -> int:
+    try:
+        first = next(filter(is_decimal_character, faulty_calibration_value))
+        last = next(filter(is_decimal_character, reversed(faulty_calibration_value)))
+    except StopIteration:
+        raise ValueError(f"No digit found. {faulty_calibration_value=}") from None
+    return 10 * int(first) + int(last)
+
+
+def fix_calibration_value_part_2(faulty_calibration_value: str, vocabulary: tuple[str, ...] = ACCEPTED_WORDS) -> int:
+    digit_automaton, _ = compile_digit_automata(vocabulary)
+    first_start = last_start = -1
+    first_value = last_value = 0
+    for start, value in digit_automaton.matches(faulty_calibration_value):
+        if first_start < 0 or start < first_start:
+            first_start, first_value = start, value
+        if start > last_start:
+            last_start, last_value = start, value
+    if first_start < 0:
+        raise ValueError(f"No digit found. {faulty_calibration_value=}")
+    return 10 * first_value + last_value
+
+
+def fix_calibration_value_part_2_early_exit(
+    faulty_calibration_value: str, vocabulary: tuple[str, ...] = ACCEPTED_WORDS
+) -> int:
+    digit_automaton, reversed_digit_automaton = compile_digit_automata(vocabulary)
+    first_match = digit_automaton.first_match(faulty_calibration_value)
+    if first_match is None:
+        raise ValueError(f"No digit found. {faulty_calibration_value=}")
+    # Matches of the reversed patterns come out ordered by their start in the original line, latest first.
+    _, last_value = next(reversed_digit_automaton.matches(reversed(faulty_calibration_value)))
+    return 10 * first_match[1] + last_value
+
+
+class MemoizedCalibration:
+    calibration_function: Callable[[str], int]
+    maxsize: int
+    hits: int
+    misses: int
+    _values: OrderedDict[str, int]
+
+    def __init__(self, calibration_function: Callable[[str], int], maxsize: int = MEMO_SIZE) -> None:
+        self.calibration_function = calibration_function
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+    def __str__(self) -> str:
+        return f"hits={self.hits} misses={self.misses} size={len(self._values)}/{self.maxsize}"
+
+    def __call__(self, faulty_calibration_value: str) -> int:
+        try:
+            value = self._values[faulty_calibration_value]
+        except KeyError:
+            self.misses += 1
+            value = self._values[faulty_calibration_value] = self.calibration_function(faulty_calibration_value)
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+        else:
+            self.hits += 1
+            self._values.move_to_end(faulty_calibration_value)
+        return value
 
 
 def add_calibration_value(
@@ -50,8 +179,109 @@ def solve(raw_input: str, calibration_function: Callable[[str], int]) -> int:
     return reduce(partial(add_calibration_value, calibration_function=calibration_function), raw_input.splitlines(), 0)
 
 
+def read_lines(
+    source: str | PathLike[str] | BinaryIO, chunk_size: int = CHUNK_SIZE, size: int = -1
+) -> Generator[str, None, None]:
+    if isinstance(source, (str, PathLike)):
+        with open(source, "rb") as file:
+            yield from read_lines(file, chunk_size, size)
+        return
+
+    remainder = b""
+    while size != 0 and (chunk := source.read(chunk_size if size < 0 else min(chunk_size, size))):
+        if size > 0:
+            size -= len(chunk)
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r").decode()
+    if remainder:
+        yield remainder.rstrip(b"\r").decode()
+
+
+def solve_file(
+    source: str | PathLike[str] | BinaryIO, calibration_function: Callable[[str], int], chunk_size: int = CHUNK_SIZE
+) -> int:
+    return reduce(
+        partial(add_calibration_value, calibration_function=calibration_function), read_lines(source, chunk_size), 0
+    )
+
+
+def split_at_newlines(path: str | PathLike[str], parts: int) -> list[tuple[int, int]]:
+    file_size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as file:
+        for part in range(1, parts):
+            file.seek(max(file_size * part // parts, boundaries[-1]))
+            file.readline()
+            boundaries.append(min(file.tell(), file_size))
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+
+def sum_byte_range(
+    path: str | PathLike[str], start: int, end: int, calibration_function: Callable[[str], int], chunk_size: int
+) -> int:
+    with open(path, "rb") as file:
+        file.seek(start)
+        return reduce(
+            partial(add_calibration_value, calibration_function=calibration_function),
+            read_lines(file, chunk_size, size=end - start),
+            0,
+        )
+
+
+def solve_parallel(
+    path: str | PathLike[str],
+    calibration_function: Callable[[str], int],
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    workers = workers or os.cpu_count() or 1
+    byte_ranges = split_at_newlines(path, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partial_sums = executor.map(
+            sum_byte_range,
+            repeat(path),
+            [start for start, _ in byte_ranges],
+            [end for _, end in byte_ranges],
+            repeat(calibration_function),
+            repeat(chunk_size),
+        )
+        return sum(partial_sums, start=0)
+
+
+def load_buffer(raw_input: str | bytes | PathLike[str]) -> np.ndarray:
+    if isinstance(raw_input, str):
+        raw_input = raw_input.encode()
+    if isinstance(raw_input, bytes):
+        return np.frombuffer(raw_input, dtype=np.uint8)
+    if os.path.getsize(raw_input) == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(raw_input, dtype=np.uint8, mode="r")
+
+
+def solve_part_1_vectorized(raw_input: str | bytes | PathLike[str]) -> int:
+    buffer = load_buffer(raw_input)
+    newlines = np.flatnonzero(buffer == ord("\n"))
+    line_count = len(newlines) + int(len(buffer) > 0 and buffer[-1] != ord("\n"))
+
+    digit_positions = np.flatnonzero((buffer - np.uint8(ord("0"))) < 10)
+    digit_lines = np.searchsorted(newlines, digit_positions)
+    first_digits = buffer[digit_positions[np.diff(digit_lines, prepend=-1) != 0]]
+    last_digits = buffer[digit_positions[np.diff(digit_lines, append=-1) != 0]]
+
+    if len(first_digits) != line_count:
+        raise ValueError("Every calibration line needs at least one digit.")
+
+    return int(10 * first_digits.sum(dtype=np.int64) + last_digits.sum(dtype=np.int64) - 11 * ord("0") * line_count)
+
+
 if __name__ == "__main__":
     print(f"{solve(test_input, fix_calibration_value_part_1)=}")
     print(f"{solve(real_input, fix_calibration_value_part_1)=}")
     print(f"{solve(test_input_part_2, fix_calibration_value_part_2)=}")
     print(f"{solve(real_input, fix_calibration_value_part_2)=}")
+    print(f"{solve(real_input, fix_calibration_value_part_1_early_exit)=}")
+    print(f"{solve(real_input, fix_calibration_value_part_2_early_exit)=}")
+    print(f"{solve_part_1_vectorized(real_input)=}")
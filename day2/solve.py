@@ -1,43 +1,76 @@
 from __future__ import annotations
 
+import hashlib
 import re
-from collections.abc import Generator
+import struct
+from collections.abc import Generator, Iterable
+from itertools import zip_longest
+from math import prod
+from os import PathLike
+from pathlib import Path
+
+import numpy as np
 
 from inputs import real_input, test_input  # noqa: F401
 
 
+DEFAULT_COLORS = ("red", "green", "blue")
+
+
+class ColorIndex:
+    names: list[str]
+    _indices: dict[str, int]
+
+    def __init__(self, names: Iterable[str] = DEFAULT_COLORS) -> None:
+        self.names = []
+        self._indices = {}
+        for name in names:
+            self.intern(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        index = self._indices.get(name)
+        if index is None:
+            index = self._indices[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def configuration(self, **counts: int) -> CubeConfiguration:
+        vector = [0] * len(self)
+        for name, count in counts.items():
+            vector[self._indices[name]] = count
+        return CubeConfiguration(*vector)
+
+
 class CubeConfiguration:
-    red: int
-    green: int
-    blue: int
+    counts: tuple[int, ...]
 
-    def __init__(self, red: int, green: int, blue: int) -> None:
-        self.red = red
-        self.green = green
-        self.blue = blue
+    def __init__(self, *counts: int) -> None:
+        self.counts = counts
 
     @staticmethod
     def copy(other: CubeConfiguration) -> CubeConfiguration:
-        return CubeConfiguration(red=other.red, green=other.green, blue=other.blue)
+        return CubeConfiguration(*other.counts)
 
     def __lt__(self, other: CubeConfiguration) -> bool:
-        return self.red < other.red and self.green < other.green and self.blue < other.blue
+        return all(mine < theirs for mine, theirs in zip_longest(self.counts, other.counts, fillvalue=0))
 
     def __le__(self, other: CubeConfiguration) -> bool:
-        return self.red <= other.red and self.green <= other.green and self.blue <= other.blue
+        return all(mine <= theirs for mine, theirs in zip_longest(self.counts, other.counts, fillvalue=0))
 
     def __eq__(self, other: CubeConfiguration) -> bool:
-        return self.red == other.red and self.green == other.green and self.blue == other.blue
+        return all(mine == theirs for mine, theirs in zip_longest(self.counts, other.counts, fillvalue=0))
 
     def __add__(self, other: CubeConfiguration) -> CubeConfiguration:
-        return CubeConfiguration(
-            red=max(self.red, other.red),
-            green=max(self.green, other.green),
-            blue=max(self.blue, other.blue),
-        )
+        return CubeConfiguration(*map(max, zip_longest(self.counts, other.counts, fillvalue=0)))
 
     def power(self) -> int:
-        return self.red * self.green * self.blue
+        return prod(self.counts)
+
+    def to_vector(self, width: int) -> tuple[int, ...]:
+        return (self.counts + (0,) * width)[:width]
 
 
 class Game:
@@ -52,39 +85,198 @@ class Game:
         return all(revealed <= bag for revealed in self.sets_of_cubes)
 
     def minimum_valid_bag(self) -> CubeConfiguration:
-        return sum(self.sets_of_cubes, start=CubeConfiguration(0, 0, 0))
+        return sum(self.sets_of_cubes, start=CubeConfiguration())
+
+
+class GameTable:
+    game_ids: np.ndarray
+    counts: np.ndarray
+
+    def __init__(self, game_ids: np.ndarray, counts: np.ndarray) -> None:
+        self.game_ids = game_ids
+        self.counts = counts
+
+    @staticmethod
+    def from_games(games: Iterable[Game]) -> GameTable:
+        game_ids: list[int] = []
+        set_counts: list[int] = []
+        vectors: list[tuple[int, ...]] = []
+        for game in games:
+            game_ids.append(game.game_id)
+            set_counts.append(len(game.sets_of_cubes))
+            vectors.extend(revealed.counts for revealed in game.sets_of_cubes)
+
+        width = max(map(len, vectors), default=0)
+        revealed_counts = np.zeros((len(vectors), width), dtype=np.int32)
+        for row, vector in enumerate(vectors):
+            revealed_counts[row, : len(vector)] = vector
+
+        sets_per_game = np.array(set_counts, dtype=np.int64)
+        game_index = np.repeat(np.arange(len(game_ids)), sets_per_game)
+        set_index = np.arange(len(revealed_counts)) - np.repeat(np.cumsum(sets_per_game) - sets_per_game, sets_per_game)
+
+        counts = np.zeros((len(game_ids), max(set_counts, default=0), width), dtype=np.int32)
+        counts[game_index, set_index] = revealed_counts
+        return GameTable(game_ids=np.array(game_ids, dtype=np.int64), counts=counts)
+
+    def valid_for_bag(self, bag: CubeConfiguration) -> np.ndarray:
+        return (self.counts <= np.array(bag.to_vector(self.counts.shape[2]), dtype=np.int32)).all(axis=(1, 2))
+
+    def minimum_valid_bags(self) -> np.ndarray:
+        return self.counts.max(axis=1, initial=0)
+
+    def power(self) -> np.ndarray:
+        return self.minimum_valid_bags().prod(axis=1, dtype=np.int64)
+
+
+class BagIndex:
+    id_sums: np.ndarray
+
+    def __init__(self, table: GameTable) -> None:
+        minimum_valid_bags = table.minimum_valid_bags()
+        id_sums = np.zeros(minimum_valid_bags.max(axis=0, initial=0) + 1, dtype=np.int64)
+        np.add.at(id_sums, tuple(minimum_valid_bags.T), table.game_ids)
+        for axis in range(id_sums.ndim):
+            np.cumsum(id_sums, axis=axis, out=id_sums)
+        self.id_sums = id_sums
+
+    def valid_id_sums(self, bags: np.ndarray | Iterable[CubeConfiguration]) -> np.ndarray:
+        if not isinstance(bags, np.ndarray):
+            width = self.id_sums.ndim
+            bags = np.array([bag.to_vector(width) for bag in bags], dtype=np.int64).reshape(-1, width)
+        clipped = np.clip(bags, 0, np.array(self.id_sums.shape) - 1)
+        return np.where((bags >= 0).all(axis=1), self.id_sums[tuple(clipped.T)], 0)
 
 
-def get_cube_count(revealed_cubes: str, color: str) -> int:
+GAME_TOKENS = re.compile(r"Game (?P<game_id>[0-9]+)|(?P<count>[0-9]+) (?P<color>[a-z]+)|(?P<separator>;)")
+
+
+def parse_game(row: str, colors: ColorIndex) -> Game:
+    game_id = None
+    revealed_sets: list[dict[int, int]] = [{}]
+
+    for token in GAME_TOKENS.finditer(row):
+        if token.lastgroup == "color":
+            revealed_sets[-1].setdefault(colors.intern(token["color"]), int(token["count"]))
+        elif token.lastgroup == "separator":
+            revealed_sets.append({})
+        elif game_id is None:
+            game_id = int(token["game_id"])
+
+    if game_id is None:
+        raise Exception(f"No game id found. {row=}")
+
+    width = len(colors)
+    sets_of_cubes = [
+        CubeConfiguration(*(revealed.get(index, 0) for index in range(width))) for revealed in revealed_sets
+    ]
+    return Game(game_id=game_id, sets_of_cubes=sets_of_cubes)
+
+
+CACHE_MAGIC = b"AOC23D2\x01"
+CACHE_HEADER = struct.Struct("<8s32sqqqq")
+
+
+def save_games(cache_path: str | PathLike[str], digest: bytes, games: list[Game], colors: ColorIndex) -> None:
+    width = len(colors)
+    names = "\n".join(colors.names).encode()
+    names += b"\0" * (-len(names) % 4)
+    game_ids = np.array([game.game_id for game in games], dtype=np.int32)
+    sets_per_game = np.array([len(game.sets_of_cubes) for game in games], dtype=np.int32)
+    counts = np.array(
+        [revealed.to_vector(width) for game in games for revealed in game.sets_of_cubes], dtype=np.int32
+    ).reshape(int(sets_per_game.sum()), width)
+
+    with open(cache_path, "wb") as file:
+        file.write(CACHE_HEADER.pack(CACHE_MAGIC, digest, len(games), len(counts), width, len(names)))
+        file.write(names)
+        file.write(game_ids.tobytes())
+        file.write(sets_per_game.tobytes())
+        file.write(counts.tobytes())
+
+
+def load_games(cache_path: str | PathLike[str], digest: bytes, colors: ColorIndex) -> list[Game] | None:
     try:
-        return int(re.search(f"(?P<{color}>[0-9]+) {color}", revealed_cubes).group(color))
-    except AttributeError:
-        return 0
+        data = Path(cache_path).read_bytes()
+    except FileNotFoundError:
+        return None
+    if len(data) < CACHE_HEADER.size:
+        return None
+    magic, cached_digest, game_count, set_count, width, names_size = CACHE_HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or cached_digest != digest:
+        return None
 
+    names = data[CACHE_HEADER.size : CACHE_HEADER.size + names_size].rstrip(b"\0").decode()
+    color_indices = [colors.intern(name) for name in names.split("\n")] if names else []
+    values = np.frombuffer(data, dtype=np.int32, offset=CACHE_HEADER.size + names_size)
+    game_ids = values[:game_count].tolist()
+    sets_per_game = values[game_count : 2 * game_count].tolist()
+    counts = np.zeros((set_count, len(colors)), dtype=np.int32)
+    counts[:, color_indices] = values[2 * game_count : 2 * game_count + set_count * width].reshape(set_count, width)
 
-def parse_revelaled_sets(raw_sets: str) -> Generator[CubeConfiguration, None, None]:
-    for revealed_cubes in raw_sets.split(";"):
-        yield CubeConfiguration(
-            red=get_cube_count(revealed_cubes, "red"),
-            green=get_cube_count(revealed_cubes, "green"),
-            blue=get_cube_count(revealed_cubes, "blue"),
-        )
+    vectors = iter(counts.tolist())
+    return [
+        Game(game_id=game_id, sets_of_cubes=[CubeConfiguration(*next(vectors)) for _ in range(set_count)])
+        for game_id, set_count in zip(game_ids, sets_per_game)
+    ]
 
 
-def parser(raw_input: str) -> Generator[Game, None, None]:
-    for row in raw_input.splitlines():
-        game_id = int(
-            re.search(
-                r"Game (?P<game_id>[0-9]+)",
-                row,
-            ).group("game_id")
-        )
-        raw_sets = row.split(":")[1]
-        yield Game(game_id=game_id, sets_of_cubes=list(parse_revelaled_sets(raw_sets)))
+def parser(
+    raw_input: str, colors: ColorIndex | None = None, cache_path: str | PathLike[str] | None = None
+) -> Generator[Game, None, None]:
+    colors = ColorIndex() if colors is None else colors
+    if cache_path is None:
+        for row in raw_input.splitlines():
+            yield parse_game(row, colors)
+        return
+
+    digest = hashlib.sha256(raw_input.encode()).digest()
+    games = load_games(cache_path, digest, colors)
+    if games is None:
+        games = [parse_game(row, colors) for row in raw_input.splitlines()]
+        save_games(cache_path, digest, games, colors)
+    yield from games
+
+
+class IncrementalScorer:
+    path: str | PathLike[str]
+    bag: CubeConfiguration
+    colors: ColorIndex
+    offset: int
+    valid_game_ids: int
+    minimum_bag_powers: int
+
+    def __init__(
+        self, path: str | PathLike[str], bag: CubeConfiguration | None = None, colors: ColorIndex | None = None
+    ) -> None:
+        self.path = path
+        self.bag = ColorIndex().configuration(red=12, green=13, blue=14) if bag is None else bag
+        self.colors = ColorIndex() if colors is None else colors
+        self.offset = 0
+        self.valid_game_ids = 0
+        self.minimum_bag_powers = 0
+
+    def update(self, final: bool = False) -> tuple[int, int]:
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            new_data = file.read()
+
+        # A trailing line without a newline may still be mid-append, so it waits for the next call.
+        consumed = len(new_data) if final else new_data.rfind(b"\n") + 1
+        for row in new_data[:consumed].decode().splitlines():
+            if not row:
+                continue
+            game = parse_game(row, self.colors)
+            if game.valid_for_bag(self.bag):
+                self.valid_game_ids += game.game_id
+            self.minimum_bag_powers += game.minimum_valid_bag().power()
+        self.offset += consumed
+
+        return self.valid_game_ids, self.minimum_bag_powers
 
 
 def solve_part1(raw_input: str) -> int:
-    bag = CubeConfiguration(red=12, green=13, blue=14)
+    bag = ColorIndex().configuration(red=12, green=13, blue=14)
 
     return sum((game.game_id for game in parser(raw_input) if game.valid_for_bag(bag)), start=0)
 
@@ -93,8 +285,21 @@ def solve_part2(raw_input: str) -> int:
     return sum((game.minimum_valid_bag().power() for game in parser(raw_input)), start=0)
 
 
+def solve_part1_columnar(raw_input: str) -> int:
+    table = GameTable.from_games(parser(raw_input))
+    bag = ColorIndex().configuration(red=12, green=13, blue=14)
+
+    return int(table.game_ids[table.valid_for_bag(bag)].sum())
+
+
+def solve_part2_columnar(raw_input: str) -> int:
+    return int(GameTable.from_games(parser(raw_input)).power().sum())
+
+
 if __name__ == "__main__":
     print(f"{solve_part1(test_input)=}")
     print(f"{solve_part1(real_input)=}")
     print(f"{solve_part2(test_input)=}")
     print(f"{solve_part2(real_input)=}")
+    print(f"{solve_part1_columnar(real_input)=}")
+    print(f"{solve_part2_columnar(real_input)=}")
@@ -1,43 +1,30 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+import os
+from collections import deque
+from collections.abc import Generator, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from os import PathLike
+
+import numpy as np
 
 from inputs import real_input, test_input  # noqa: F401
 
-SYMBOLS = {
-    ":",
-    "^",
-    "_",
-    "`",
-    ",",
-    ";",
-    "<",
-    "(",
-    "@",
-    "*",
-    "=",
-    "~",
-    ">",
-    '"',
-    "]",
-    "{",
-    ")",
-    "%",
-    " ",
-    "+",
-    "/",
-    "$",
-    "\\",
-    "[",
-    "-",
-    "!",
-    "|",
-    "'",
-    "#",
-    "?",
-    "&",
-    "}",
-}
+DIGIT = ord("0")
+EMPTY = ord(".")
+SYMBOL = ord("#")
+NEWLINE = ord("\n")
+
+
+def byte_class_table(accepted_symbols: set[str] | None = None) -> bytes:
+    table = bytearray([SYMBOL if accepted_symbols is None else EMPTY]) * 256
+    for symbol in accepted_symbols or ():
+        table[ord(symbol)] = SYMBOL
+    table[ord("0") : ord("9") + 1] = bytes([DIGIT]) * 10
+    table[ord(".")] = EMPTY
+    table[ord("\n")] = table[ord("\r")] = NEWLINE
+    return bytes(table)
 
 
 class Position:
@@ -75,65 +62,199 @@ class Number:
         return False
 
 
-def is_number(character: str) -> bool:
-    return 48 <= ord(character) <= 57
+class SchematicIndex:
+    numbers: list[Number]
+    labels: list[list[int]]
 
+    def __init__(self, numbers: list[Number], height: int, width: int) -> None:
+        self.numbers = numbers
+        self.labels = [[-1] * width for _ in range(height)]
+        for number_id, number in enumerate(numbers):
+            length = number.end.col - number.start.col + 1
+            self.labels[number.start.row][number.start.col : number.end.col + 1] = [number_id] * length
 
-def end_of_the_row(row: str, current_col: int) -> bool:
-    return len(row) == (current_col + 1)
+    def adjacent_number_ids(self, position: Position) -> set[int]:
+        number_ids = set()
+        for row in self.labels[max(position.row - 1, 0) : position.row + 2]:
+            number_ids.update(row[max(position.col - 1, 0) : position.col + 2])
+        number_ids.discard(-1)
+        return number_ids
 
+    def adjacent_numbers(self, position: Position) -> list[Number]:
+        return [self.numbers[number_id] for number_id in sorted(self.adjacent_number_ids(position))]
 
-def parse_numbers(raw_input: str) -> Generator[Number, None, None]:
-    schematic = raw_input.splitlines()
+    def part_numbers(self, symbols: Iterable[Position]) -> list[Number]:
+        number_ids = set()
+        for symbol in symbols:
+            number_ids.update(self.adjacent_number_ids(symbol))
+        return [self.numbers[number_id] for number_id in sorted(number_ids)]
+
+    def gear_ratios(self, gears: Iterable[Position]) -> Generator[int, None, None]:
+        for gear in gears:
+            adjacent = self.adjacent_numbers(gear)
+            if len(adjacent) == 2:
+                yield adjacent[0].value * adjacent[1].value
+
+
+def scan_schematic(
+    schematic: list[str], accepted_symbols: set[str] | None = None
+) -> tuple[list[Number], list[Position]]:
+    table = byte_class_table(accepted_symbols)
+    numbers: list[Number] = []
+    symbols: list[Position] = []
     for current_row, row in enumerate(schematic):
-        current_number_value = ""
+        encoded = row.encode("ascii", errors="replace")
+        current_number_value = 0
         start_col = None
-        for current_col in range(len(row)):
-            if is_number(schematic[current_row][current_col]):
+        for current_col, byte_class in enumerate(encoded.translate(table)):
+            if byte_class == DIGIT:
                 if start_col is None:
                     start_col = current_col
-                current_number_value += schematic[current_row][current_col]
-                if end_of_the_row(row, current_col) or not is_number(schematic[current_row][current_col + 1]):
-                    yield Number(
-                        value=int(current_number_value),
+                    current_number_value = 0
+                current_number_value = 10 * current_number_value + encoded[current_col] - DIGIT
+                continue
+            if start_col is not None:
+                numbers.append(
+                    Number(
+                        value=current_number_value,
                         start=Position(row=current_row, col=start_col),
-                        end=Position(row=current_row, col=current_col),
+                        end=Position(row=current_row, col=current_col - 1),
                     )
-                    current_number_value = ""
-                    start_col = None
+                )
+                start_col = None
+            if byte_class == SYMBOL:
+                symbols.append(Position(row=current_row, col=current_col))
+        if start_col is not None:
+            numbers.append(
+                Number(
+                    value=current_number_value,
+                    start=Position(row=current_row, col=start_col),
+                    end=Position(row=current_row, col=len(row) - 1),
+                )
+            )
+    return numbers, symbols
 
 
-def parse_symbols(raw_input: str, accepted_symbols: set[str]) -> Generator[Position, None, None]:
-    schematic = raw_input.splitlines()
-    for current_row, row in enumerate(schematic):
-        for current_col in range(len(row)):
-            if schematic[current_row][current_col] in accepted_symbols:
-                yield Position(row=current_row, col=current_col)
+def parse_numbers(raw_input: str) -> Generator[Number, None, None]:
+    numbers, _ = scan_schematic(raw_input.splitlines(), accepted_symbols=set())
+    yield from numbers
+
+
+def parse_symbols(raw_input: str, accepted_symbols: set[str] | None = None) -> Generator[Position, None, None]:
+    _, symbols = scan_schematic(raw_input.splitlines(), accepted_symbols)
+    yield from symbols
+
+
+def index_schematic(schematic: list[str], numbers: list[Number]) -> SchematicIndex:
+    return SchematicIndex(numbers, height=len(schematic), width=max(map(len, schematic), default=0))
 
 
 def count_part_numbers(raw_input: str) -> int:
-    numbers = list(parse_numbers(raw_input))
-    symbols = list(parse_symbols(raw_input, accepted_symbols=SYMBOLS))
+    schematic = raw_input.splitlines()
+    numbers, symbols = scan_schematic(schematic)
+
+    return sum(number.value for number in index_schematic(schematic, numbers).part_numbers(symbols))
+
+
+def count_part_numbers_vectorized(raw_input: str) -> int:
+    schematic = raw_input.splitlines()
+    width = max(map(len, schematic), default=0) + 1
+    # Every row is padded with at least one "." so digit runs never continue onto the next row.
+    padded_rows = "".join(row.ljust(width, ".") for row in schematic).encode("ascii", errors="replace")
+    classes = np.frombuffer(byte_class_table(), dtype=np.uint8)[
+        np.frombuffer(padded_rows, dtype=np.uint8).reshape(len(schematic), width)
+    ]
 
-    return sum((number.value for number in numbers if number.has_adjacent_symbol(symbols)))
+    symbols = np.pad(classes == SYMBOL, 1)
+    near_symbol = np.zeros_like(classes, dtype=bool)
+    for row_shift in range(3):
+        for col_shift in range(3):
+            near_symbol |= symbols[row_shift : row_shift + len(schematic), col_shift : col_shift + width]
+
+    digits = (classes == DIGIT).ravel()
+    digit_values = np.frombuffer(padded_rows, dtype=np.uint8)[digits].astype(np.int64) - DIGIT
+    run_starts = digits & ~np.concatenate(([False], digits[:-1]))
+    run_ids = (np.cumsum(run_starts) - 1)[digits]
+    run_ends = np.flatnonzero(np.diff(run_ids, append=-1) != 0)
+    place_values = 10 ** (run_ends[run_ids] - np.arange(len(run_ids)))
+
+    number_values = np.zeros(len(run_ends), dtype=np.int64)
+    np.add.at(number_values, run_ids, digit_values * place_values)
+    part_number_ids = np.unique(run_ids[near_symbol.ravel()[digits]])
+
+    return int(number_values[part_number_ids].sum())
 
 
 def count_gear_ratios(raw_input: str) -> int:
-    numbers = list(parse_numbers(raw_input))
-    symbols = list(parse_symbols(raw_input, accepted_symbols={"*"}))
+    schematic = raw_input.splitlines()
+    numbers, gears = scan_schematic(schematic, accepted_symbols={"*"})
+
+    return sum(index_schematic(schematic, numbers).gear_ratios(gears))
+
+
+def solve(raw_input: str) -> tuple[int, int]:
+    schematic = raw_input.splitlines()
+    numbers, symbols = scan_schematic(schematic)
+    index = index_schematic(schematic, numbers)
+    gears = [symbol for symbol in symbols if schematic[symbol.row][symbol.col] == "*"]
+
+    return sum(number.value for number in index.part_numbers(symbols)), sum(index.gear_ratios(gears))
+
 
-    result = 0
+def count_stripe(rows: list[str]) -> tuple[int, int]:
+    # The first and last rows are halo rows: they are read for adjacency but counted by the neighbouring stripes.
+    numbers, symbols = scan_schematic(rows)
+    index = index_schematic(rows, numbers)
+    owned_rows = range(1, len(rows) - 1)
+    gears = [symbol for symbol in symbols if symbol.row in owned_rows and rows[symbol.row][symbol.col] == "*"]
+
+    part_numbers = sum(number.value for number in index.part_numbers(symbols) if number.start.row in owned_rows)
+    return part_numbers, sum(index.gear_ratios(gears))
+
+
+def window_contributions(above: str, row: str, below: str) -> tuple[int, int]:
+    return count_stripe([above, row, below])
+
+
+def stream_contributions(rows: Iterable[str]) -> Generator[tuple[int, int], None, None]:
+    window = deque([""], maxlen=3)
+    for row in rows:
+        window.append(row)
+        if len(window) == 3:
+            yield window_contributions(*window)
+    window.append("")
+    if len(window) == 3:
+        yield window_contributions(*window)
+
+
+def solve_file(path: str | PathLike[str]) -> tuple[int, int]:
+    part_numbers = gear_ratios = 0
+    with open(path) as file:
+        for part_number_contribution, gear_ratio_contribution in stream_contributions(
+            row.rstrip("\r\n") for row in file
+        ):
+            part_numbers += part_number_contribution
+            gear_ratios += gear_ratio_contribution
+    return part_numbers, gear_ratios
+
+
+def solve_parallel(raw_input: str, workers: int | None = None) -> tuple[int, int]:
+    schematic = raw_input.splitlines()
+    workers = workers or os.cpu_count() or 1
+    stripe_height = max(ceil(len(schematic) / workers), 1)
+    padded = ["", *schematic, ""]
+    stripes = [padded[start : start + stripe_height + 2] for start in range(0, len(schematic), stripe_height)]
 
-    for symbol in symbols:
-        adjacent = symbol.adjacent_numbers(numbers)
-        if len(adjacent) == 2:
-            result += adjacent[0].value * adjacent[1].value
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(count_stripe, stripes))
 
-    return result
+    return sum(part_numbers for part_numbers, _ in results), sum(gear_ratios for _, gear_ratios in results)
 
 
 if __name__ == "__main__":
     print(f"{count_part_numbers(test_input)= }")
     print(f"{count_part_numbers(real_input)= }")
+    print(f"{count_part_numbers_vectorized(real_input)= }")
     print(f"{count_gear_ratios(test_input)= }")
     print(f"{count_gear_ratios(real_input)= }")
+    print(f"{solve(real_input)= }")
@@ -1,30 +1,41 @@
-import re
-from collections.abc import Generator
-from functools import cached_property
+from collections import deque
+from collections.abc import Generator, Iterable, Sequence
+from os import PathLike
+
+import numpy as np
 
 from inputs import real_input, test_input  # noqa: F401
 
 
+def to_bitmask(numbers: Iterable[int]) -> int:
+    bitmask = 0
+    for number in numbers:
+        bitmask |= 1 << number
+    return bitmask
+
+
+def from_bitmask(bitmask: int) -> list[int]:
+    return [number for number in range(bitmask.bit_length()) if bitmask >> number & 1]
+
+
 class Card:
     game_id: int
-    winning_numbers: list[int]
-    guessed_numbers: list[int]
-    copies: int
+    winning_mask: int
+    guessed_mask: int
 
-    def __init__(self, game_id: int, winning_numbers: list[int], guessed_numbers: list[int]) -> None:
+    def __init__(self, game_id: int, winning_mask: int, guessed_mask: int) -> None:
         self.game_id = game_id
-        self.winning_numbers = winning_numbers
-        self.guessed_numbers = guessed_numbers
-        self.copies = 1
+        self.winning_mask = winning_mask
+        self.guessed_mask = guessed_mask
 
     def __str__(self) -> str:
-        winning_numbers = " ".join(f"{number:2d}" for number in self.winning_numbers)
-        guessed_numbers = " ".join(f"{number:2d}" for number in self.guessed_numbers)
+        winning_numbers = " ".join(f"{number:2d}" for number in from_bitmask(self.winning_mask))
+        guessed_numbers = " ".join(f"{number:2d}" for number in from_bitmask(self.guessed_mask))
         return f"Game {self.game_id}: {winning_numbers} | {guessed_numbers}"
 
-    @cached_property
+    @property
     def matches(self) -> int:
-        return len(set(self.winning_numbers).intersection(set(self.guessed_numbers)))
+        return (self.winning_mask & self.guessed_mask).bit_count()
 
     def points(self) -> int:
         if self.matches <= 0:
@@ -34,45 +45,107 @@ class Card:
             return 2**power  # type: ignore
 
 
-def parse_game_id(raw_card: str) -> int:
-    regex_match = re.search("Card[\s]*(?P<game_id>[0-9]+)", raw_card)
-    if regex_match is None:
-        raise Exception(f"No game id found. {raw_card=}")
-    else:
-        return int(regex_match.group("game_id"))
+def parse_card(raw_card: str | bytes) -> Card:
+    header, _, raw_numbers = raw_card.partition(":" if isinstance(raw_card, str) else b":")
+    raw_winning_numbers, _, raw_guessed_numbers = raw_numbers.partition("|" if isinstance(raw_card, str) else b"|")
+    try:
+        game_id = int(header.split()[-1])
+    except (IndexError, ValueError):
+        raise Exception(f"No game id found. {raw_card=}") from None
+
+    return Card(
+        game_id=game_id,
+        winning_mask=to_bitmask(map(int, raw_winning_numbers.split())),
+        guessed_mask=to_bitmask(map(int, raw_guessed_numbers.split())),
+    )
+
+
+def parse_cards(raw_cards: str | bytes) -> Generator[Card, None, None]:
+    for raw_card in raw_cards.splitlines():
+        yield parse_card(raw_card)
+
+
+def count_points_scored(raw_cards: str | bytes) -> int:
+    return sum(card.points() for card in parse_cards(raw_cards))
+
+
+def propagate_copies(matches: Sequence[int]) -> list[int]:
+    # pending[i] is the change in won copies from card i - 1 to card i; wins past the last card land in the sentinel.
+    pending = [0] * (len(matches) + 1)
+    copies: list[int] = []
+    won_copies = 0
+
+    for card_id, card_matches in enumerate(matches):
+        won_copies += pending[card_id]
+        card_copies = 1 + won_copies
+        copies.append(card_copies)
+        pending[card_id + 1] += card_copies
+        pending[min(card_id + card_matches + 1, len(matches))] -= card_copies
+
+    return copies
+
+
+def count_scratchcards(raw_cards: str | bytes) -> int:
+    return sum(propagate_copies([card.matches for card in parse_cards(raw_cards)]))
 
 
-def parse_winning_numbers(raw_card: str) -> list[int]:
-    raw_numbers = re.findall(r"\d+", raw_card.split(":")[1].split("|")[0])
-    return list(map(int, raw_numbers))
+def count_streamed_scratchcards(matches: Iterable[int]) -> int:
+    # Ring buffer of copy changes for the upcoming cards only; it never grows beyond the largest match count.
+    pending: deque[int] = deque()
+    won_copies = 0
+    total_copies = 0
 
+    for card_matches in matches:
+        won_copies += pending.popleft() if pending else 0
+        card_copies = 1 + won_copies
+        total_copies += card_copies
+        if len(pending) <= card_matches:
+            pending.extend([0] * (card_matches + 1 - len(pending)))
+        pending[0] += card_copies
+        pending[card_matches] -= card_copies
 
-def parse_guessed_numbers(raw_card: str) -> list[int]:
-    raw_numbers = re.findall(r"\d+", raw_card.split(":")[1].split("|")[1])
-    return list(map(int, raw_numbers))
+    return total_copies
 
 
-def parse_cards(raw_cards: str) -> Generator[Card, None, None]:
+def count_scratchcards_file(path: str | PathLike[str]) -> int:
+    with open(path) as file:
+        return count_streamed_scratchcards(parse_card(raw_card).matches for raw_card in file if raw_card.strip())
+
+
+def load_card_matrices(raw_cards: str | bytes) -> tuple[np.ndarray, np.ndarray]:
+    winning_rows = []
+    guessed_rows = []
     for raw_card in raw_cards.splitlines():
-        yield Card(
-            game_id=parse_game_id(raw_card),
-            winning_numbers=parse_winning_numbers(raw_card),
-            guessed_numbers=parse_guessed_numbers(raw_card),
-        )
+        _, _, raw_numbers = raw_card.partition(":" if isinstance(raw_card, str) else b":")
+        raw_winning_numbers, _, raw_guessed_numbers = raw_numbers.partition("|" if isinstance(raw_card, str) else b"|")
+        winning_rows.append(raw_winning_numbers.split())
+        guessed_rows.append(raw_guessed_numbers.split())
 
+    if not winning_rows:
+        return np.zeros((0, 0), dtype=np.int64), np.zeros((0, 0), dtype=np.int64)
+    return np.array(winning_rows, dtype=np.int64), np.array(guessed_rows, dtype=np.int64)
 
-def count_points_scored(raw_cards: str) -> int:
-    return sum(card.points() for card in parse_cards(raw_cards))
+
+def count_matches_vectorized(raw_cards: str | bytes) -> np.ndarray:
+    winning_numbers, guessed_numbers = load_card_matrices(raw_cards)
+    size = max(winning_numbers.max(initial=0), guessed_numbers.max(initial=0)) + 1
+    card_rows = np.arange(len(winning_numbers))[:, np.newaxis]
+
+    is_winning = np.zeros((len(winning_numbers), size), dtype=bool)
+    is_winning[card_rows, winning_numbers] = True
+    is_guessed = np.zeros((len(guessed_numbers), size), dtype=bool)
+    is_guessed[card_rows, guessed_numbers] = True
+
+    return (is_winning & is_guessed).sum(axis=1)
 
 
-def count_scratchcards(raw_cards: str) -> int:
-    cards = list(parse_cards(raw_cards))
+def count_points_scored_vectorized(raw_cards: str | bytes) -> int:
+    matches = count_matches_vectorized(raw_cards)
+    return int(np.where(matches > 0, np.left_shift(1, np.maximum(matches - 1, 0)), 0).sum())
 
-    for card_id, card in enumerate(cards):
-        for i in range(1, card.matches + 1):
-            cards[card_id + i].copies += card.copies
 
-    return sum(card.copies for card in cards)
+def count_scratchcards_vectorized(raw_cards: str | bytes) -> int:
+    return sum(propagate_copies(count_matches_vectorized(raw_cards).tolist()))
 
 
 if __name__ == "__main__":
@@ -80,3 +153,5 @@ if __name__ == "__main__":
     print(f"{count_points_scored(real_input) = }")
     print(f"{count_scratchcards(test_input) = }")
     print(f"{count_scratchcards(real_input) = }")
+    print(f"{count_points_scored_vectorized(real_input) = }")
+    print(f"{count_scratchcards_vectorized(real_input) = }")